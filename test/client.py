@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 
+import http.client
 import json
 import uuid
 from urllib.error import HTTPError
-from urllib.request import HTTPHandler, OpenerDirector, Request
+from urllib.parse import urlsplit
 
 __all__ = ['TestClient']
 
@@ -12,18 +13,32 @@ class TestClient(object):
 		self.host = host
 		self.port = port
 		self.timeout = timeout
-
-	opener_director = OpenerDirector()
-	opener_director.add_handler(HTTPHandler())
+		self.connection = None
 
 	def send_request(self, url, headers = {}, arguments = None):
 		if not isinstance(arguments, bytes):
 			arguments = bytes(json.dumps(arguments), 'ascii')
-		request = Request(method = 'POST', url = url, headers = headers, data = arguments)
-		with self.opener_director.open(request, timeout = self.timeout) as response:
-			if response.status != 200:
-				raise HTTPError(url, response.status, response.msg, response.headers, None)
-			return json.loads(str(response.read(), 'ascii'))
+		path = urlsplit(url).path
+		try:
+			response = self.request('POST', path, headers, arguments)
+		except (ConnectionError, http.client.HTTPException):
+			# the server may have dropped the idle keep-alive connection
+			self.close()
+			response = self.request('POST', path, headers, arguments)
+		if response.status != 200:
+			raise HTTPError(url, response.status, response.reason, response.headers, None)
+		return json.loads(str(response.read(), 'ascii'))
+
+	def request(self, method, path, headers, body):
+		if self.connection is None:
+			self.connection = http.client.HTTPConnection(self.host, self.port, timeout = self.timeout)
+		self.connection.request(method, path, body = body, headers = headers)
+		return self.connection.getresponse()
+
+	def close(self):
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
 
 	class Scope(object):
 		def __init__(self, harness):
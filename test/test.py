@@ -1,12 +1,25 @@
 #!/usr/bin/env python
 
+import json
 import os
+import re
+import socket
 import sys
 import unittest
 from client import TestClient
 from server import TestServer
 from tracecontext import Traceparent, Tracestate
 
+TRACEPARENT_FORMAT = r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$'
+TRACEPARENT_RE = re.compile(TRACEPARENT_FORMAT)
+
+# trace context field values used across the tests, decoded once so
+# assertions compare bytes directly instead of hex strings
+TRACE_ID_11 = bytes.fromhex('12345678901234567890123456789011')
+TRACE_ID_12 = bytes.fromhex('12345678901234567890123456789012')
+ZERO_TRACE_ID = bytes.fromhex('00000000000000000000000000000000')
+PARENT_ID_12 = bytes.fromhex('1234567890123456')
+
 client = None
 server = None
 
@@ -21,96 +34,160 @@ def environ(name, default = None):
 STRICT_LEVEL = int(environ('STRICT_LEVEL', '2'))
 print('STRICT_LEVEL: {}'.format(STRICT_LEVEL))
 
+HARNESS_DEBUG = 'HARNESS_DEBUG' in os.environ
+
 def setUpModule():
 	global client
 	global server
-	environ('SERVICE_ENDPOINT')
-	client = client or TestClient(host = '127.0.0.1', port = 7777, timeout = 5)
-	server = server or TestServer(host = '127.0.0.1', port = 7777, timeout = 3)
+	TestBase.service_endpoint = environ('SERVICE_ENDPOINT')
+	host = environ('HARNESS_HOST', '127.0.0.1')
+	port = environ('HARNESS_PORT', '7777')
+	timeout = environ('HARNESS_TIMEOUT', '5')
+	bind_host = environ('HARNESS_BIND_HOST', host)
+	bind_port = environ('HARNESS_BIND_PORT', port)
+	# under pytest-xdist every worker runs its own copy of this module, so
+	# shift the harness port per worker to let them listen side by side;
+	# the callback urls handed to the service already carry the port
+	worker = os.environ.get('PYTEST_XDIST_WORKER', '')
+	offset = int(''.join(filter(str.isdigit, worker)) or '0')
+	if client is None:
+		client = TestClient(host = host, port = int(port) + offset, timeout = int(timeout) + 1)
+	if server is None:
+		server = TestServer(host = bind_host, port = int(bind_port) + offset, timeout = int(timeout))
 	server.start()
-	with client.scope() as scope:
-		response = scope.send_request()
+	# a raw connect is enough to verify the harness is listening; the first
+	# test supplies the HTTP exchange the old warm-up request used to do
+	probe = socket.create_connection((host, int(port) + offset), timeout = int(timeout))
+	probe.close()
 
 def tearDownModule():
+	client.close()
 	server.stop()
 
 class TestBase(unittest.TestCase):
-	import re
-	traceparent_name_re = re.compile(r'^traceparent$', re.IGNORECASE)
-	traceparent_format = r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$'
-	traceparent_format_re = re.compile(traceparent_format)
-	tracestate_name_re = re.compile(r'^tracestate$', re.IGNORECASE)
-
 	def make_request(self, headers, count = 1):
-		import pprint
 		with client.scope() as scope:
+			keys = [str(idx) for idx in range(count)]
 			arguments = {
-				'url': environ('SERVICE_ENDPOINT'),
+				'url': self.service_endpoint,
 				'headers': headers,
-				'arguments': [],
+				'arguments': [{'url': scope.url(key), 'arguments': []} for key in keys],
 			}
-			for idx in range(count):
-				arguments['arguments'].append({'url': scope.url(str(idx)), 'arguments': []})
 			response = scope.send_request(arguments = arguments)
-			verbose = ['', '']
-			verbose.append('Harness trying to send the following request to your service {0}'.format(arguments['url']))
+			if HARNESS_DEBUG:
+				print(self.format_verbose(arguments, response, count))
+			result = []
+			for key in keys:
+				callback = response.get(key)
+				if callback is None:
+					self.fail('your test service failed to make a callback to the test harness {}'.format(self.format_verbose(arguments, response, count)))
+				result.append(callback)
+			return result
+
+	def format_verbose(self, arguments, response, count):
+		verbose = ['', '']
+		verbose.append('Harness trying to send the following request to your service {0}'.format(arguments['url']))
+		verbose.append('')
+		verbose.append('POST {} HTTP/1.1'.format(arguments['url']))
+		verbose.extend('{}: {}'.format(key, value) for key, value in arguments['headers'])
+		verbose.append('')
+		verbose.append(json.dumps(arguments['arguments']))
+		verbose.append('')
+		results = response['results'][0]
+		if 'exception' in results:
+			verbose.append('Harness got an exception {}'.format(results['exception']))
 			verbose.append('')
-			verbose.append('POST {} HTTP/1.1'.format(arguments['url']))
-			for key, value in arguments['headers']:
-				verbose.append('{}: {}'.format(key, value))
+			verbose.append(results['msg'])
+		else:
+			verbose.append('Your service {} responded with HTTP status {}'.format(arguments['url'], results['status']))
 			verbose.append('')
-			verbose.append(pprint.pformat(arguments['arguments']))
+			verbose.extend('{}: {}'.format(key, value) for key, value in results['headers'])
 			verbose.append('')
-			results = response['results'][0]
-			if 'exception' in results:
-				verbose.append('Harness got an exception {}'.format(results['exception']))
-				verbose.append('')
-				verbose.append(results['msg'])
+			if isinstance(results['body'], str):
+				verbose.append(results['body'])
 			else:
-				verbose.append('Your service {} responded with HTTP status {}'.format(arguments['url'], results['status']))
+				verbose.append(json.dumps(results['body']))
+		for idx in range(count):
+			callback = response.get(str(idx))
+			if callback is not None:
+				verbose.append('Your service {} made the following callback to harness'.format(arguments['url']))
 				verbose.append('')
-				for key, value in results['headers']:
-					verbose.append('{}: {}'.format(key, value))
+				verbose.extend('{}: {}'.format(key, value) for key, value in callback['headers'])
 				verbose.append('')
-				if isinstance(results['body'], str):
-					verbose.append(results['body'])
-				else:
-					verbose.append(pprint.pformat(results['body']))
-			for idx in range(count):
-				if str(idx) in response:
-					verbose.append('Your service {} made the following callback to harness'.format(arguments['url']))
-					verbose.append('')
-					for key, value in response[str(idx)]['headers']:
-						verbose.append('{}: {}'.format(key, value))
-					verbose.append('')
-			verbose.append('')
-			verbose = os.linesep.join(verbose)
-			if 'HARNESS_DEBUG' in os.environ:
-				print(verbose)
-			result = []
-			for idx in range(count):
-				self.assertTrue(str(idx) in response, 'your test service failed to make a callback to the test harness {}'.format(verbose))
-				result.append(response[str(idx)])
-			return result
+		verbose.append('')
+		return '\n'.join(verbose)
+
+	# get_traceparent and get_tracestate expect header names that have been
+	# case folded once through fold_headers, so they compare names directly
+	def fold_headers(self, headers):
+		return [(key.lower(), value) for key, value in headers]
 
 	def get_traceparent(self, headers):
-		retval = []
+		found = None
 		for key, value in headers:
-			if self.traceparent_name_re.match(key):
-				retval.append((key, value))
-		self.assertEqual(len(retval), 1, 'expect one traceparent header, got {} {!r}'.format('more' if retval else 'zero', retval))
-		return Traceparent.from_string(retval[0][1])
+			if key == 'traceparent':
+				if found is not None:
+					self.fail('expect one traceparent header, got more {!r}'.format([kv for kv in headers if kv[0] == 'traceparent']))
+				found = value
+		if found is None:
+			self.fail('expect one traceparent header, got zero')
+		# fast path for the common well-formed header: fixed-offset dash
+		# checks plus bytes.fromhex, which decodes the hex fields through a
+		# C-level lookup table; malformed headers fall through to the regex
+		if len(found) == 55 and found[2] == '-' and found[35] == '-' and found[52] == '-' and found == found.lower():
+			try:
+				return Traceparent(bytes.fromhex(found[0:2]), bytes.fromhex(found[3:35]), bytes.fromhex(found[36:52]), bytes.fromhex(found[53:55]))
+			except ValueError:
+				pass
+		match = TRACEPARENT_RE.match(found)
+		if match is None:
+			self.fail('expect a valid traceparent header, got {!r}'.format(found))
+		version, trace_id, parent_id, trace_flags = map(bytes.fromhex, match.groups())
+		return Traceparent(version, trace_id, parent_id, trace_flags)
 
 	def get_tracestate(self, headers):
 		tracestate = Tracestate()
-		for key, value in headers:
-			if self.tracestate_name_re.match(key):
-				tracestate.from_string(value)
+		values = [value for key, value in headers if key == 'tracestate']
+		if values:
+			tracestate.from_string(','.join(values))
 		return tracestate
 
+	# memoized (traceparent, tracestate) pairs keyed by the request headers,
+	# shared across test cases so repeated inputs skip the round trip
+	tracecontext_cache = {}
+
+	def make_single_requests_and_get_tracecontexts(self, variants):
+		# one harness round trip carrying one service request per header
+		# variant, each with its own callback slot
+		with client.scope() as scope:
+			keys = [str(idx) for idx in range(len(variants))]
+			actions = [{
+				'url': self.service_endpoint,
+				'headers': headers,
+				'arguments': [{'url': scope.url(key), 'arguments': []}],
+			} for key, headers in zip(keys, variants)]
+			response = scope.send_request(arguments = actions)
+			if HARNESS_DEBUG:
+				print(json.dumps(actions))
+				print(json.dumps(response))
+			result = []
+			for key in keys:
+				callback = response.get(key)
+				if callback is None:
+					self.fail('your test service failed to make a callback to the test harness {}'.format(json.dumps(response)))
+				headers = self.fold_headers(callback['headers'])
+				result.append((self.get_traceparent(headers), self.get_tracestate(headers)))
+			return result
+
 	def make_single_request_and_get_tracecontext(self, headers):
-		headers = self.make_request(headers)[0]['headers']
-		return (self.get_traceparent(headers), self.get_tracestate(headers))
+		key = tuple(map(tuple, headers))
+		cached = self.tracecontext_cache.get(key)
+		if cached is None:
+			headers = self.fold_headers(self.make_request(headers)[0]['headers'])
+			cached = (self.get_traceparent(headers), self.get_tracestate(headers))
+			self.tracecontext_cache[key] = cached
+		traceparent, tracestate = cached
+		return (traceparent, Tracestate(tracestate))
 
 class TraceContextTest(TestBase):
 	def test_both_traceparent_and_tracestate_missing(self):
@@ -128,8 +205,8 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-		self.assertNotEqual(traceparent.parent_id.hex(), '1234567890123456')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
+		self.assertNotEqual(traceparent.parent_id, PARENT_ID_12)
 
 	def test_traceparent_duplicated(self):
 		'''
@@ -140,23 +217,18 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789011-1234567890123456-01'],
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789011')
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotIn(traceparent.trace_id, {TRACE_ID_11, TRACE_ID_12})
 
 	def test_traceparent_header_name(self):
 		'''
 		harness sends an invalid traceparent using wrong names
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['trace-parent', '00-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['trace.parent', '00-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['trace-parent', '00-12345678901234567890123456789012-1234567890123456-01']],
+			[['trace.parent', '00-12345678901234567890123456789012-1234567890123456-01']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_header_name_valid_casing(self):
 		'''
@@ -166,32 +238,28 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['TraceParent', '00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['TrAcEpArEnT', '00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['TRACEPARENT', '00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_0x00(self):
 		'''
 		harness sends an invalid traceparent with extra trailing characters
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01.'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01-what-the-future-will-be-like'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '00-12345678901234567890123456789012-1234567890123456-01.']],
+			[['traceparent', '00-12345678901234567890123456789012-1234567890123456-01-what-the-future-will-be-like']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_0xcc(self):
 		'''
@@ -201,17 +269,17 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', 'cc-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', 'cc-12345678901234567890123456789012-1234567890123456-01-what-the-future-will-be-like'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', 'cc-12345678901234567890123456789012-1234567890123456-01.what-the-future-will-be-like'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_0xff(self):
 		'''
@@ -221,37 +289,29 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', 'ff-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_illegal_characters(self):
 		'''
 		harness sends an invalid traceparent with illegal characters in version
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '.0-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '0.-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '.0-12345678901234567890123456789012-1234567890123456-01']],
+			[['traceparent', '0.-12345678901234567890123456789012-1234567890123456-01']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_too_long(self):
 		'''
 		harness sends an invalid traceparent with version more than 2 HEXDIG
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '000-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '0000-12345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '000-12345678901234567890123456789012-1234567890123456-01']],
+			[['traceparent', '0000-12345678901234567890123456789012-1234567890123456-01']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_version_too_short(self):
 		'''
@@ -261,7 +321,7 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '0-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_trace_id_all_zero(self):
 		'''
@@ -271,22 +331,22 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-00000000000000000000000000000000-1234567890123456-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '00000000000000000000000000000000')
+		self.assertNotEqual(traceparent.trace_id, ZERO_TRACE_ID)
 
 	def test_traceparent_trace_id_illegal_characters(self):
 		'''
 		harness sends an invalid traceparent with illegal characters in trace_id
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-.2345678901234567890123456789012-1234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '.2345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-1234567890123456789012345678901.-1234567890123456-01'],
+		trace_ids = [
+			'.2345678901234567890123456789012',
+			'1234567890123456789012345678901.',
+		]
+		results = self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '00-' + trace_id + '-1234567890123456-01']] for trace_id in trace_ids
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '1234567890123456789012345678901.')
+		for (traceparent, tracestate), trace_id in zip(results, trace_ids):
+			self.assertNotEqual(traceparent.trace_id.hex(), trace_id)
 
 	def test_traceparent_trace_id_too_long(self):
 		'''
@@ -296,9 +356,11 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-123456789012345678901234567890123-1234567890123456-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '123456789012345678901234567890123')
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-		self.assertNotEqual(traceparent.trace_id.hex(), '23456789012345678901234567890123')
+		self.assertNotIn(traceparent.trace_id.hex(), {
+			'123456789012345678901234567890123',
+			'12345678901234567890123456789012',
+			'23456789012345678901234567890123',
+		})
 
 	def test_traceparent_trace_id_too_short(self):
 		'''
@@ -318,22 +380,18 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-0000000000000000-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_parent_id_illegal_characters(self):
 		'''
 		harness sends an invalid traceparent with illegal characters in parent_id
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-.234567890123456-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-123456789012345.-01'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '00-12345678901234567890123456789012-.234567890123456-01']],
+			[['traceparent', '00-12345678901234567890123456789012-123456789012345.-01']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_parent_id_too_long(self):
 		'''
@@ -343,7 +401,7 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-12345678901234567-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_parent_id_too_short(self):
 		'''
@@ -353,22 +411,18 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-123456789012345-01'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_trace_flags_illegal_characters(self):
 		'''
 		harness sends an invalid traceparent with illegal characters in trace_flags
 		expects a valid traceparent from the output header, with a newly generated trace_id
 		'''
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-1234567890123456-.0'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
-
-		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
-			['traceparent', '00-12345678901234567890123456789012-1234567890123456-0.'],
-		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		for traceparent, tracestate in self.make_single_requests_and_get_tracecontexts([
+			[['traceparent', '00-12345678901234567890123456789012-1234567890123456-.0']],
+			[['traceparent', '00-12345678901234567890123456789012-1234567890123456-0.']],
+		]):
+			self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_trace_flags_too_long(self):
 		'''
@@ -378,7 +432,7 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-001'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_trace_flags_too_short(self):
 		'''
@@ -388,7 +442,7 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-1'],
 		])
-		self.assertNotEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertNotEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_traceparent_ows_handling(self):
 		'''
@@ -398,27 +452,27 @@ class TraceContextTest(TestBase):
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', ' 00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '\t00-12345678901234567890123456789012-1234567890123456-01'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01 '],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01\t'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '\t 00-12345678901234567890123456789012-1234567890123456-01 \t'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 	def test_tracestate_included_traceparent_missing(self):
 		'''
@@ -444,7 +498,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1,bar=2'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn("foo", tracestate)
 		self.assertIn("bar", tracestate)
 		self.assertEqual(tracestate['foo'], '1')
@@ -503,14 +557,14 @@ class TraceContextTest(TestBase):
 			['tracestate', ''],
 		])
 		self.assertTrue(not tracestate)
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1'],
 			['tracestate', ''],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -519,7 +573,7 @@ class TraceContextTest(TestBase):
 			['tracestate', ''],
 			['tracestate', 'foo=1'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -534,7 +588,7 @@ class TraceContextTest(TestBase):
 			['tracestate', 'rojo=1,congo=2'],
 			['tracestate', 'baz=3'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertTrue('foo=1' in str(tracestate))
 		self.assertTrue('bar=2' in str(tracestate))
 		self.assertTrue('rojo=1' in str(tracestate))
@@ -555,14 +609,14 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1,foo=1'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertRaises(KeyError, lambda: tracestate['foo'])
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1,foo=2'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertRaises(KeyError, lambda: tracestate['foo'])
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
@@ -570,7 +624,7 @@ class TraceContextTest(TestBase):
 			['tracestate', 'foo=1'],
 			['tracestate', 'foo=1'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertRaises(KeyError, lambda: tracestate['foo'])
 
 		traceparent, tracestate = self.make_single_request_and_get_tracecontext([
@@ -578,7 +632,7 @@ class TraceContextTest(TestBase):
 			['tracestate', 'foo=1'],
 			['tracestate', 'foo=2'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertRaises(KeyError, lambda: tracestate['foo'])
 
 	def test_tracestate_all_allowed_characters(self):
@@ -646,7 +700,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', ' foo=1'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -654,7 +708,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', '\tfoo=1'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -662,7 +716,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1 '],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -670,7 +724,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', 'foo=1\t'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -678,7 +732,7 @@ class TraceContextTest(TestBase):
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-00'],
 			['tracestate', '\t foo=1 \t'],
 		])
-		self.assertEqual(traceparent.trace_id.hex(), '12345678901234567890123456789012')
+		self.assertEqual(traceparent.trace_id, TRACE_ID_12)
 		self.assertIn('foo', tracestate)
 		self.assertEqual(tracestate['foo'], '1')
 
@@ -839,7 +893,7 @@ class AdvancedTest(TestBase):
 		for response in self.make_request([
 			['traceparent', '00-12345678901234567890123456789012-1234567890123456-01'],
 		], 3):
-			traceparent = self.get_traceparent(response['headers'])
+			traceparent = self.get_traceparent(self.fold_headers(response['headers']))
 			trace_ids.add(traceparent.trace_id.hex())
 			parent_ids.add(traceparent.parent_id.hex())
 		self.assertEqual(len(trace_ids), 1)
@@ -854,7 +908,7 @@ class AdvancedTest(TestBase):
 		trace_ids = set()
 		parent_ids = set()
 		for response in self.make_request([], 3):
-			traceparent = self.get_traceparent(response['headers'])
+			traceparent = self.get_traceparent(self.fold_headers(response['headers']))
 			trace_ids.add(traceparent.trace_id.hex())
 			parent_ids.add(traceparent.parent_id.hex())
 		self.assertEqual(len(parent_ids), 3)
@@ -869,7 +923,7 @@ class AdvancedTest(TestBase):
 		for response in self.make_request([
 			['traceparent', '00-00000000000000000000000000000000-1234567890123456-01'],
 		], 3):
-			traceparent = self.get_traceparent(response['headers'])
+			traceparent = self.get_traceparent(self.fold_headers(response['headers']))
 			trace_ids.add(traceparent.trace_id.hex())
 			parent_ids.add(traceparent.parent_id.hex())
 		self.assertFalse('00000000000000000000000000000000' in trace_ids)
@@ -900,14 +954,6 @@ Example:
 		'''.strip().format(sys.argv[0]), file = sys.stderr)
 		exit(-1)
 
-	host = environ('HARNESS_HOST', '127.0.0.1')
-	port = environ('HARNESS_PORT', '7777')
-	timeout = environ('HARNESS_TIMEOUT', '5')
-	bind_host = environ('HARNESS_BIND_HOST', host)
-	bind_port = environ('HARNESS_BIND_PORT', port)
-	client = TestClient(host = host, port = int(port), timeout = int(timeout) + 1)
-	server = TestServer(host = bind_host, port = int(bind_port), timeout = int(timeout))
-
 	suite = unittest.TestSuite()
 	loader = unittest.TestLoader()
 	if len(sys.argv) > 2:
@@ -2,6 +2,8 @@ import re
 import uuid
 
 class BaseTraceparent(object):
+	__slots__ = ('_version', '_trace_id', '_parent_id', '_trace_flags', '_residue')
+
 	_VERSION_FORMAT_RE = re.compile('^[0-9a-f]{2}$')
 	_TRACE_ID_FORMAT_RE = re.compile('^[0-9a-f]{32}$')
 	_PARENT_ID_FORMAT_RE = re.compile('^[0-9a-f]{16}$')
@@ -115,6 +117,8 @@ class BaseTraceparent(object):
 	trace_flags = property(get_trace_flags, set_trace_flags)
 
 class Traceparent(BaseTraceparent):
+	__slots__ = ()
+
 	def __init__(self, version = 0, trace_id = None, parent_id = None, trace_flags = 0):
 		if trace_id is None:
 			trace_id = uuid.uuid1().hex